@@ -1,14 +1,29 @@
 import os
 import json
+import asyncio
 import logging
+import sqlite3
 from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Depends, Security, status
+from fastapi import (
+    FastAPI,
+    HTTPException,
+    Depends,
+    Query,
+    Request,
+    Response,
+    Security,
+    status,
+)
 from fastapi.security import APIKeyHeader
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from presidio_anonymizer import AnonymizerEngine
 from presidio_anonymizer.entities import OperatorConfig
 from analyzer_setup import create_analyzer_engine
+from job_queue import JobStore, PendingLimitError
+from structured import StructuredAnonymizer
+from wire import WireRoute, render
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -43,30 +58,44 @@ load_api_keys()
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
 
-async def get_api_key(api_key_header: str = Security(api_key_header)):
+async def verify_api_key(api_key_header: str = Security(api_key_header)):
+    """
+    Authenticates the key without counting the request against its limit.
+    Used for job polling, which should not burn the key's quota.
+    """
     if api_key_header not in api_keys_db:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API Key",
         )
+    return api_key_header
 
-    user_data = api_keys_db[api_key_header]
+
+def charge_requests(api_key: str, count: int = 1):
+    """
+    Counts `count` requests against the key's limit, raising 429 if exceeded.
+    """
+    user_data = api_keys_db[api_key]
     username = user_data.get("user", "Unknown")
     limit = user_data.get("limit", 0)
 
     # Simple in-memory rate limiting (per restart)
     current_count = request_counts.get(username, 0)
-    if current_count >= limit:
+    if current_count + count > limit:
         logger.warning(f"Rate limit exceeded for user: {username}")
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Rate limit exceeded",
         )
 
-    request_counts[username] = current_count + 1
+    request_counts[username] = current_count + count
     logger.info(
         f"Access granted for user: {username} ({request_counts[username]}/{limit})"
     )
+
+
+async def get_api_key(api_key_header: str = Depends(verify_api_key)):
+    charge_requests(api_key_header)
     return api_key_header
 
 
@@ -75,6 +104,8 @@ app = FastAPI(
     description="REST API for anonymizing Russian personal data suitable for n8n/Zapier integrations.",
     version="1.0.0",
 )
+# Accept gzip/zstd-compressed request bodies on every route
+app.router.route_class = WireRoute
 
 # Initialize engines at startup
 logger.info("Initializing Presidio engines...")
@@ -82,6 +113,19 @@ analyzer = create_analyzer_engine()
 anonymizer = AnonymizerEngine()
 logger.info("Engines ready.")
 
+# Background job spool (survives restarts, see job_queue.py).
+# Opened in the startup hook so a broken spool does not take down /anonymize.
+JOB_SPOOL_PATH = os.getenv("JOB_SPOOL_PATH", "jobs.db")
+JOB_CHUNK_SIZE = int(os.getenv("JOB_CHUNK_SIZE", "20"))
+# Finished jobs (texts and results) are deleted after this many seconds
+JOB_TTL = int(os.getenv("JOB_TTL", str(24 * 60 * 60)))
+# Unprocessed texts a single key may keep in the spool
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "100000"))
+job_store = None
+job_wakeup = asyncio.Event()
+JOB_POLL_INTERVAL = 5
+JOB_PURGE_INTERVAL = 60
+
 
 class AnonymizeRequest(BaseModel):
     text: str
@@ -95,56 +139,114 @@ class AuditResponse(BaseModel):
     entities: list
 
 
+class StructuredRequest(BaseModel):
+    format: Literal["json", "csv"] = "json"
+    data: Any
+    policies: Dict[str, str] = {}
+
+
+class StructuredResponse(BaseModel):
+    data: Any
+
+
+class JobRequest(BaseModel):
+    kind: Literal["anonymize", "audit"] = "anonymize"
+    texts: List[str]
+    priority: int = Field(0, ge=0, le=9)
+
+
+class JobStatusResponse(BaseModel):
+    id: str
+    kind: str
+    priority: int
+    status: str
+    total: int
+    done: int
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+
+class JobResultResponse(BaseModel):
+    id: str
+    status: str
+    offset: int
+    results: list
+
+
+# Reuse the same operators as in main.py
+OPERATORS = {
+    # --- Standard PII ---
+    "RU_PASSPORT": OperatorConfig("replace", {"new_value": "<PASSPORT_RF>"}),
+    "RU_SNILS": OperatorConfig("replace", {"new_value": "<SNILS>"}),
+    "RU_INN": OperatorConfig("replace", {"new_value": "<INN>"}),
+    "PERSON": OperatorConfig("replace", {"new_value": "<PERSON>"}),
+    "PHONE_NUMBER": OperatorConfig("replace", {"new_value": "<PHONE>"}),
+    "EMAIL_ADDRESS": OperatorConfig("replace", {"new_value": "<EMAIL>"}),
+    "ORGANIZATION": OperatorConfig("replace", {"new_value": "<ORG>"}),
+    "LOCATION": OperatorConfig("replace", {"new_value": "<LOC>"}),
+    "RU_DRIVER_LICENSE": OperatorConfig("replace", {"new_value": "<DRIVER_LICENSE>"}),
+    "RU_OMS": OperatorConfig("replace", {"new_value": "<OMS>"}),
+    "RU_VEHICLE_PLATE": OperatorConfig("replace", {"new_value": "<CAR_PLATE>"}),
+    "TG_CHAT_ID": OperatorConfig("replace", {"new_value": "<TG_CHAT_ID>"}),
+    # --- Extended PII ---
+    "IP_ADDRESS": OperatorConfig("replace", {"new_value": "<IP>"}),
+    "IBAN_CODE": OperatorConfig("replace", {"new_value": "<BANK_ACCOUNT>"}),
+    "CRYPTO": OperatorConfig("replace", {"new_value": "<WALLET>"}),
+    "CREDIT_CARD": OperatorConfig("replace", {"new_value": "<BANK_CARD>"}),
+    "CVV": OperatorConfig("replace", {"new_value": "<CVV>"}),
+    "MAC_ADDRESS": OperatorConfig("replace", {"new_value": "<MAC>"}),
+    "EME_IMEI": OperatorConfig("replace", {"new_value": "<IMEI>"}),
+    "GPS_COORDS": OperatorConfig("replace", {"new_value": "<GEO>"}),
+    "DATE_TIME": OperatorConfig("replace", {"new_value": "<DATE>"}),
+    "RU_INT_PASSPORT": OperatorConfig("replace", {"new_value": "<PASSPORT_INT>"}),
+    # --- Spacy Mappings ---
+    "NORP": OperatorConfig("replace", {"new_value": "<GROUP>"}),
+    "FAC": OperatorConfig("replace", {"new_value": "<LOC>"}),
+    "GPE": OperatorConfig("replace", {"new_value": "<LOC>"}),
+    "DEFAULT": OperatorConfig("replace", {"new_value": "<ANONYMIZED>"}),
+}
+
+
+def anonymize_text(text: str) -> str:
+    results = analyzer.analyze(text=text, language="ru")
+    anonymized_result = anonymizer.anonymize(
+        text=text, analyzer_results=results, operators=OPERATORS
+    )
+    return anonymized_result.text
+
+
+def audit_entities(text: str) -> list:
+    results = analyzer.analyze(text=text, language="ru")
+    report = []
+    for res in results:
+        report.append(
+            {
+                "entity_type": res.entity_type,
+                "start": res.start,
+                "end": res.end,
+                "score": res.score,
+            }
+        )
+    return report
+
+
+structured_anonymizer = StructuredAnonymizer(analyzer, anonymizer, OPERATORS)
+
+JOB_HANDLERS = {"anonymize": anonymize_text, "audit": audit_entities}
+
+
 @app.post("/anonymize", response_model=AnonymizeResponse)
-async def anonymize(request: AnonymizeRequest, token: str = Depends(get_api_key)):
+async def anonymize(
+    request: AnonymizeRequest,
+    http_request: Request,
+    token: str = Depends(get_api_key),
+):
     """
     Anonymize input text replacing PII with placeholders.
     """
     try:
-        results = analyzer.analyze(text=request.text, language="ru")
-
-        # Reuse the same operators as in main.py
-        operators = {
-            # --- Standard PII ---
-            "RU_PASSPORT": OperatorConfig("replace", {"new_value": "<PASSPORT_RF>"}),
-            "RU_SNILS": OperatorConfig("replace", {"new_value": "<SNILS>"}),
-            "RU_INN": OperatorConfig("replace", {"new_value": "<INN>"}),
-            "PERSON": OperatorConfig("replace", {"new_value": "<PERSON>"}),
-            "PHONE_NUMBER": OperatorConfig("replace", {"new_value": "<PHONE>"}),
-            "EMAIL_ADDRESS": OperatorConfig("replace", {"new_value": "<EMAIL>"}),
-            "ORGANIZATION": OperatorConfig("replace", {"new_value": "<ORG>"}),
-            "LOCATION": OperatorConfig("replace", {"new_value": "<LOC>"}),
-            "RU_DRIVER_LICENSE": OperatorConfig(
-                "replace", {"new_value": "<DRIVER_LICENSE>"}
-            ),
-            "RU_OMS": OperatorConfig("replace", {"new_value": "<OMS>"}),
-            "RU_VEHICLE_PLATE": OperatorConfig("replace", {"new_value": "<CAR_PLATE>"}),
-            "TG_CHAT_ID": OperatorConfig("replace", {"new_value": "<TG_CHAT_ID>"}),
-            # --- Extended PII ---
-            "IP_ADDRESS": OperatorConfig("replace", {"new_value": "<IP>"}),
-            "IBAN_CODE": OperatorConfig("replace", {"new_value": "<BANK_ACCOUNT>"}),
-            "CRYPTO": OperatorConfig("replace", {"new_value": "<WALLET>"}),
-            "CREDIT_CARD": OperatorConfig("replace", {"new_value": "<BANK_CARD>"}),
-            "CVV": OperatorConfig("replace", {"new_value": "<CVV>"}),
-            "MAC_ADDRESS": OperatorConfig("replace", {"new_value": "<MAC>"}),
-            "EME_IMEI": OperatorConfig("replace", {"new_value": "<IMEI>"}),
-            "GPS_COORDS": OperatorConfig("replace", {"new_value": "<GEO>"}),
-            "DATE_TIME": OperatorConfig("replace", {"new_value": "<DATE>"}),
-            "RU_INT_PASSPORT": OperatorConfig(
-                "replace", {"new_value": "<PASSPORT_INT>"}
-            ),
-            # --- Spacy Mappings ---
-            "NORP": OperatorConfig("replace", {"new_value": "<GROUP>"}),
-            "FAC": OperatorConfig("replace", {"new_value": "<LOC>"}),
-            "GPE": OperatorConfig("replace", {"new_value": "<LOC>"}),
-            "DEFAULT": OperatorConfig("replace", {"new_value": "<ANONYMIZED>"}),
-        }
-
-        anonymized_result = anonymizer.anonymize(
-            text=request.text, analyzer_results=results, operators=operators
-        )
-
-        return AnonymizeResponse(anonymized_text=anonymized_result.text)
+        return render(http_request, {"anonymized_text": anonymize_text(request.text)})
 
     except Exception as e:
         logger.error(f"Error processing request: {e}")
@@ -152,23 +254,214 @@ async def anonymize(request: AnonymizeRequest, token: str = Depends(get_api_key)
 
 
 @app.post("/audit", response_model=AuditResponse)
-async def audit(request: AnonymizeRequest, token: str = Depends(get_api_key)):
+async def audit(
+    request: AnonymizeRequest,
+    http_request: Request,
+    token: str = Depends(get_api_key),
+):
     """
     Return detected entities without modifying text.
     Requires X-API-Token header.
     """
-    results = analyzer.analyze(text=request.text, language="ru")
-    report = []
-    for res in results:
-        report.append(
-            {
-                "entity_type": res.entity_type,
-                "start": res.start,
-                "end": res.end,
-                "score": res.score,
-            }
+    return render(http_request, {"entities": audit_entities(request.text)})
+
+
+@app.post("/anonymize/structured", response_model=StructuredResponse)
+async def anonymize_structured(
+    request: StructuredRequest,
+    http_request: Request,
+    token: str = Depends(get_api_key),
+):
+    """
+    Anonymize JSON records or a CSV table field by field, keeping the structure.
+    `policies` maps field names to skip / regex / full or a forced entity type.
+    """
+    if request.format == "csv" and not isinstance(request.data, str):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="CSV data must be a string",
+        )
+    try:
+        if request.format == "csv":
+            data = structured_anonymizer.anonymize_csv(request.data, request.policies)
+        else:
+            data = structured_anonymizer.anonymize_json(request.data, request.policies)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        )
+    return render(http_request, {"data": data})
+
+
+def get_job_store() -> JobStore:
+    if job_store is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Job spool is unavailable",
+        )
+    return job_store
+
+
+def get_owned_job(job_id: str, token: str) -> dict:
+    job = get_job_store().get(job_id)
+    if job is None or job["owner"] != api_keys_db[token].get("user", "Unknown"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
+        )
+    return job
+
+
+def job_payload(job: dict) -> dict:
+    return {key: value for key, value in job.items() if key != "owner"}
+
+
+@app.post("/jobs", response_model=JobStatusResponse, status_code=202)
+async def submit_job(
+    request: JobRequest,
+    http_request: Request,
+    token: str = Depends(verify_api_key),
+):
+    """
+    Queue a batch of texts for background anonymization or audit.
+    Every text counts as one request against the key's limit.
+    Poll GET /jobs/{id} for progress and fetch GET /jobs/{id}/result when done.
+    """
+    store = get_job_store()
+    owner = api_keys_db[token].get("user", "Unknown")
+    cost = max(len(request.texts), 1)
+    charge_requests(token, cost)
+    try:
+        job_id = await asyncio.to_thread(
+            store.submit, owner, request.kind, request.texts, request.priority
+        )
+    except PendingLimitError as e:
+        # The texts were not queued, give the requests back
+        request_counts[owner] -= cost
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e)
+        )
+    job_wakeup.set()
+    return render(http_request, job_payload(store.get(job_id)), status_code=202)
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def job_status(
+    job_id: str, http_request: Request, token: str = Depends(verify_api_key)
+):
+    """
+    Return job status and progress.
+    """
+    return render(http_request, job_payload(get_owned_job(job_id, token)))
+
+
+@app.get("/jobs/{job_id}/result", response_model=JobResultResponse)
+async def job_result(
+    job_id: str,
+    http_request: Request,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1),
+    token: str = Depends(verify_api_key),
+):
+    """
+    Return results of a finished job, in the order of submitted texts.
+    Large jobs can be paged with offset/limit.
+    """
+    job = get_owned_job(job_id, token)
+    if job["status"] != "done":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {job['status']}",
+        )
+    return render(
+        http_request,
+        {
+            "id": job_id,
+            "status": job["status"],
+            "offset": offset,
+            "results": await asyncio.to_thread(
+                job_store.results, job_id, offset, limit
+            ),
+        },
+    )
+
+
+@app.delete("/jobs/{job_id}", status_code=204)
+async def delete_job(job_id: str, token: str = Depends(verify_api_key)):
+    """
+    Delete a job with its texts and results. A running job is stopped.
+    """
+    get_owned_job(job_id, token)
+    await asyncio.to_thread(job_store.delete, job_id)
+    return Response(status_code=204)
+
+
+def tenant_weights() -> dict:
+    # Scheduling weight of each tenant is its request limit
+    return {
+        data.get("user", "Unknown"): data.get("limit", 0)
+        for data in api_keys_db.values()
+    }
+
+
+def process_chunk(kind: str, items: list) -> list:
+    handler = JOB_HANDLERS[kind]
+    return [(seq, handler(text)) for seq, text in items]
+
+
+async def run_next_chunk() -> bool:
+    """
+    Processes one chunk of queued work. Returns False if the spool is empty.
+    """
+    chunk = await asyncio.to_thread(job_store.next_chunk, tenant_weights())
+    if chunk is None:
+        return False
+
+    job_id, kind, items = chunk
+    try:
+        results = await asyncio.to_thread(process_chunk, kind, items)
+    except Exception as e:
+        await asyncio.to_thread(job_store.fail, job_id, str(e))
+    else:
+        await asyncio.to_thread(job_store.complete_chunk, job_id, results)
+    return True
+
+
+async def job_worker():
+    last_purge = 0.0
+    loop = asyncio.get_running_loop()
+    while True:
+        # Clear before polling so a submit racing with an empty poll is not lost
+        job_wakeup.clear()
+        try:
+            if loop.time() - last_purge >= JOB_PURGE_INTERVAL:
+                await asyncio.to_thread(job_store.purge, JOB_TTL)
+                last_purge = loop.time()
+            if await run_next_chunk():
+                continue
+        except Exception as e:
+            # Spool errors (locked database, full disk) must not kill the worker
+            logger.exception(f"Job worker error: {e}")
+        try:
+            await asyncio.wait_for(job_wakeup.wait(), timeout=JOB_POLL_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+@app.on_event("startup")
+async def start_job_worker():
+    global job_store
+    try:
+        job_store = JobStore(
+            JOB_SPOOL_PATH, chunk_size=JOB_CHUNK_SIZE, max_pending=JOB_MAX_PENDING
+        )
+    except (OSError, sqlite3.Error) as e:
+        logger.error(
+            f"Cannot open job spool {JOB_SPOOL_PATH}: {e}. Check that the "
+            "directory exists and is writable; /jobs endpoints are disabled."
         )
-    return AuditResponse(entities=report)
+        return
+    # Keep a reference so the task is not garbage-collected
+    app.state.job_worker = asyncio.create_task(job_worker())
 
 
 @app.get("/health")
@@ -0,0 +1,148 @@
+"""
+Serialization cost per megabyte of payload for the API wire formats.
+
+Compares FastAPI's own response_model path (the endpoint builds a Pydantic
+model, FastAPI validates it and serializes it with pydantic-core) with
+wire.render (orjson / MessagePack), and plain JSON request bodies with
+gzip/zstd-compressed ones. Does not need the Spacy model.
+
+Usage:
+    python bench_wire.py [spans] [text_kb]
+"""
+
+import gzip
+import json
+import random
+import sys
+import time
+from fastapi import Request
+from fastapi.utils import create_model_field
+from pydantic import BaseModel
+from wire import decompress, dumps_json, msgpack, orjson, render, zstandard
+
+ENTITY_TYPES = ["PERSON", "RU_PASSPORT", "PHONE_NUMBER", "LOCATION", "DATE_TIME"]
+WORDS = ["Иван", "Петров", "паспорт", "<PERSON>", "<PHONE>", "Москва", "договор"]
+
+
+class AnonymizeResponse(BaseModel):
+    anonymized_text: str
+
+
+class AuditResponse(BaseModel):
+    entities: list
+
+
+def make_audit(spans):
+    rng = random.Random(0)
+    return {
+        "entities": [
+            {
+                "entity_type": rng.choice(ENTITY_TYPES),
+                "start": i * 10,
+                "end": i * 10 + rng.randint(3, 9),
+                "score": round(rng.random(), 2),
+            }
+            for i in range(spans)
+        ]
+    }
+
+
+def make_text(kb):
+    rng = random.Random(0)
+    words = []
+    size = 0
+    while size < kb * 1024:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word.encode()) + 1
+    return {"anonymized_text": " ".join(words)}
+
+
+def bench(fn, repeat=5):
+    """Best-of-N wall time of one call, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(title, rows, size):
+    mb = size / (1024 * 1024)
+    print(f"\n{title} ({size / 1024:.0f} KB JSON)")
+    for name, seconds, out_size in rows:
+        print(
+            f"  {name:<28} {seconds * 1000 / mb:8.2f} ms/MB"
+            f"  {out_size / 1024:8.0f} KB on the wire"
+        )
+
+
+def make_request(accept):
+    return Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+
+
+def response_model_body(field, model, payload):
+    """What FastAPI does for an endpoint returning a model with response_model."""
+    value, errors = field.validate(model(**payload), {}, loc=("response",))
+    assert not errors
+    return field.serialize_json(value)
+
+
+def bench_response(title, payload, model):
+    size = len(dumps_json(payload))
+    field = create_model_field(name="response", type_=model, mode="serialization")
+    before = response_model_body(field, model, payload)
+    rows = [
+        (
+            "response_model (before)",
+            bench(lambda: response_model_body(field, model, payload)),
+            len(before),
+        )
+    ]
+    for name, accept in (
+        ("render: json", "application/json"),
+        ("render: msgpack", "application/msgpack"),
+    ):
+        request = make_request(accept)
+        body = render(request, payload).body
+        rows.append((name, bench(lambda: render(request, payload).body), len(body)))
+    report(title, rows, size)
+
+
+def bench_request(title, payload):
+    raw = json.dumps(payload, ensure_ascii=False).encode()
+    gz = gzip.compress(raw, compresslevel=6)
+    rows = [("json (before)", bench(lambda: json.loads(raw)), len(raw))]
+    rows.append(
+        ("gzip + json", bench(lambda: json.loads(decompress(gz, "gzip"))), len(gz))
+    )
+    if zstandard is not None:
+        zst = zstandard.ZstdCompressor(level=3).compress(raw)
+        rows.append(
+            (
+                "zstd + json",
+                bench(lambda: json.loads(decompress(zst, "zstd"))),
+                len(zst),
+            )
+        )
+    report(title, rows, len(raw))
+
+
+def main():
+    spans = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    text_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 1024
+
+    print("=== Wire format benchmark ===")
+    print(f"orjson: {orjson is not None}, msgpack: {msgpack is not None}, ", end="")
+    print(f"zstandard: {zstandard is not None}")
+
+    audit = make_audit(spans)
+    text = make_text(text_kb)
+    bench_response(f"/audit response, {spans} spans", audit, AuditResponse)
+    bench_response("/anonymize response", text, AnonymizeResponse)
+    bench_request("Request body decoding", {"text": text["anonymized_text"]})
+
+
+if __name__ == "__main__":
+    main()
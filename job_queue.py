@@ -0,0 +1,266 @@
+import json
+import logging
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# Configure logger
+logger = logging.getLogger("job_queue")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_pending ON jobs (status, owner, priority);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+PENDING_STATUSES = ("queued", "running")
+
+
+class PendingLimitError(Exception):
+    """Raised when a submission would exceed the tenant's pending item limit."""
+
+
+def _timestamp(moment):
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _now():
+    return _timestamp(datetime.now(timezone.utc))
+
+
+class JobStore:
+    """
+    On-disk spool for asynchronous anonymization jobs.
+
+    Every job is split into items (one text each) stored in SQLite, so both
+    payloads and partial results survive a restart: unfinished items are simply
+    picked up again. A raw text is erased as soon as its item is processed (or
+    its job fails), and finished jobs are removed by `delete` or `purge`.
+
+    Work is handed out in chunks of `chunk_size` items and the tenant for the
+    next chunk is chosen by start-time fair queueing, weighted by the tenant's
+    `limit` from api_keys.json. Within one tenant, higher `priority` jobs go
+    first, then the oldest. A tenant may have at most `max_pending` unprocessed
+    items in the spool.
+    """
+
+    def __init__(self, path="jobs.db", chunk_size=20, max_pending=None):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        # Virtual finish time per tenant; kept in memory, everyone restarts at 0
+        self._vtime = {}
+        self._clock = 0.0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def submit(self, owner, kind, texts, priority=0):
+        """
+        Spools a new job and returns its id.
+
+        Raises:
+            PendingLimitError: The owner would exceed `max_pending` items.
+        """
+        job_id = uuid.uuid4().hex
+        now = _now()
+        status = "queued" if texts else "done"
+        with self._lock, self._conn:
+            if self.max_pending is not None:
+                pending = self._conn.execute(
+                    "SELECT COALESCE(SUM(total - done), 0) FROM jobs "
+                    "WHERE owner = ? AND status IN (?, ?)",
+                    (owner, *PENDING_STATUSES),
+                ).fetchone()[0]
+                if pending + len(texts) > self.max_pending:
+                    raise PendingLimitError(
+                        f"{owner} has {pending} pending item(s), "
+                        f"limit is {self.max_pending}"
+                    )
+            self._conn.execute(
+                "INSERT INTO jobs (id, owner, kind, priority, status, total, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, owner, kind, priority, status, len(texts), now, now),
+            )
+            self._conn.executemany(
+                "INSERT INTO job_items (job_id, seq, payload) VALUES (?, ?, ?)",
+                ((job_id, seq, text) for seq, text in enumerate(texts)),
+            )
+        logger.info(f"Job {job_id} queued for {owner}: {len(texts)} item(s)")
+        return job_id
+
+    def get(self, job_id):
+        """
+        Returns job metadata as a dict, or None if the job does not exist.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, owner, kind, priority, status, total, done, error, "
+                "created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def results(self, job_id, offset=0, limit=None):
+        """
+        Returns decoded item results of a job ordered by position.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT result FROM job_items WHERE job_id = ? ORDER BY seq "
+                "LIMIT ? OFFSET ?",
+                (job_id, -1 if limit is None else limit, offset),
+            ).fetchall()
+        return [json.loads(row["result"]) for row in rows if row["result"] is not None]
+
+    def next_chunk(self, weights):
+        """
+        Picks the next chunk of work.
+
+        Args:
+            weights: Mapping of owner -> scheduling weight (the key's `limit`).
+
+        Returns:
+            A tuple (job_id, kind, [(seq, text), ...]) or None if the spool is empty.
+        """
+        with self._lock:
+            owners = [
+                row["owner"]
+                for row in self._conn.execute(
+                    "SELECT DISTINCT owner FROM jobs WHERE status IN (?, ?)",
+                    PENDING_STATUSES,
+                )
+            ]
+            if not owners:
+                return None
+
+            # Tenants that were idle rejoin at the current virtual clock
+            owner = min(
+                owners, key=lambda o: (max(self._vtime.get(o, 0.0), self._clock), o)
+            )
+            job = self._conn.execute(
+                "SELECT id, kind FROM jobs WHERE owner = ? AND status IN (?, ?) "
+                "ORDER BY priority DESC, created_at, rowid LIMIT 1",
+                (owner, *PENDING_STATUSES),
+            ).fetchone()
+            items = self._conn.execute(
+                "SELECT seq, payload FROM job_items "
+                "WHERE job_id = ? AND result IS NULL ORDER BY seq LIMIT ?",
+                (job["id"], self.chunk_size),
+            ).fetchall()
+
+            # Charge the tenant for the chunk proportionally to its size
+            start = max(self._vtime.get(owner, 0.0), self._clock)
+            cost = sum(len(item["payload"]) for item in items) or 1
+            self._clock = start
+            self._vtime[owner] = start + cost / max(weights.get(owner, 1), 1)
+
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ?",
+                    (_now(), job["id"]),
+                )
+        return (
+            job["id"],
+            job["kind"],
+            [(item["seq"], item["payload"]) for item in items],
+        )
+
+    def complete_chunk(self, job_id, results):
+        """
+        Stores results for processed items and finishes the job once all are done.
+
+        Args:
+            results: List of (seq, result) pairs; results must be JSON-serializable.
+        """
+        with self._lock, self._conn:
+            # Raw text is not needed once the item is processed
+            self._conn.executemany(
+                "UPDATE job_items SET result = ?, payload = '' "
+                "WHERE job_id = ? AND seq = ?",
+                (
+                    (json.dumps(result, ensure_ascii=False), job_id, seq)
+                    for seq, result in results
+                ),
+            )
+            self._conn.execute(
+                "UPDATE jobs SET done = (SELECT COUNT(*) FROM job_items "
+                "WHERE job_id = ? AND result IS NOT NULL), updated_at = ? WHERE id = ?",
+                (job_id, _now(), job_id),
+            )
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done' WHERE id = ? AND done >= total",
+                (job_id,),
+            )
+
+    def fail(self, job_id, error):
+        """
+        Marks a job as failed; its remaining items are no longer scheduled.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? "
+                "WHERE id = ?",
+                (error, _now(), job_id),
+            )
+            self._conn.execute(
+                "UPDATE job_items SET payload = '' WHERE job_id = ?", (job_id,)
+            )
+        logger.error(f"Job {job_id} failed: {error}")
+
+    def delete(self, job_id):
+        """
+        Removes a job with all its texts and results. Returns False if not found.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM job_items WHERE job_id = ?", (job_id,))
+            deleted = self._conn.execute(
+                "DELETE FROM jobs WHERE id = ?", (job_id,)
+            ).rowcount
+        return deleted > 0
+
+    def purge(self, ttl):
+        """
+        Removes finished (done or failed) jobs not updated for `ttl` seconds.
+        Returns the number of removed jobs.
+        """
+        cutoff = _timestamp(datetime.now(timezone.utc) - timedelta(seconds=ttl))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM job_items WHERE job_id IN (SELECT id FROM jobs "
+                "WHERE status IN ('done', 'failed') AND updated_at < ?)",
+                (cutoff,),
+            )
+            purged = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') "
+                "AND updated_at < ?",
+                (cutoff,),
+            ).rowcount
+        if purged:
+            logger.info(f"Purged {purged} finished job(s) older than {ttl}s")
+        return purged
@@ -0,0 +1,191 @@
+import copy
+import csv
+import io
+import logging
+import re
+from presidio_analyzer import BatchAnalyzerEngine, EntityRecognizer, RecognizerResult
+from presidio_analyzer.predefined_recognizers import SpacyRecognizer
+
+# Configure logger
+logger = logging.getLogger("structured")
+
+SKIP = "skip"
+REGEX = "regex"
+FULL = "full"
+
+# Field names (case-insensitive) whose whole value is a known entity type
+DEFAULT_FIELD_POLICIES = {
+    "inn": "RU_INN",
+    "snils": "RU_SNILS",
+    "passport": "RU_PASSPORT",
+    "phone": "PHONE_NUMBER",
+    "email": "EMAIL_ADDRESS",
+    "oms": "RU_OMS",
+    "ip": "IP_ADDRESS",
+    "chat_id": "TG_CHAT_ID",
+    "id": SKIP,
+    "uuid": SKIP,
+    "guid": SKIP,
+}
+
+UUID_RE = re.compile(
+    r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$"
+)
+# Plain numbers ("1500", "-3.5", "1500,00") and ISO dates/times are treated like
+# JSON numbers: short-number patterns (CVV, TG_CHAT_ID) would mangle them
+NUMBER_RE = re.compile(r"^[+-]?\d+(?:[.,]\d+)?$")
+ISO_DATETIME_RE = re.compile(
+    r"^\d{4}-\d{2}-\d{2}"
+    r"(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?$"
+)
+# No letters at all: phones, document numbers, codes - NER has nothing to find there
+NO_LETTERS_RE = re.compile(r"^[\W\d_]*$")
+
+
+class StructuredAnonymizer:
+    """
+    Anonymizes JSON documents and CSV tables field by field, keeping their structure.
+
+    Each value gets a policy, looked up by its field name (for list items, the
+    name of the list). A policy set on an object or list applies to everything
+    inside it:
+        skip  - value is returned as is;
+        regex - only pattern recognizers run, spaCy NER is not invoked;
+        full  - full analysis; all such values go through spaCy as one batch;
+        <ENTITY_TYPE> - the whole value is replaced as that entity, e.g. RU_INN.
+
+    Fields without an explicit policy fall back to DEFAULT_FIELD_POLICIES, then to
+    the value itself: booleans, nulls, numbers, numeric strings, ISO dates/times
+    and UUIDs are skipped, other strings without letters get regex, everything
+    else gets full analysis. A number is only masked by an explicit policy; a
+    JSON number is then replaced by a placeholder string (e.g. "<INN>"), while
+    unmatched numbers keep their type.
+    """
+
+    def __init__(self, analyzer, anonymizer, operators, language="ru", batch_size=32):
+        self.analyzer = analyzer
+        self.anonymizer = anonymizer
+        self.operators = operators
+        self.language = language
+        self.batch_size = batch_size
+        self.batch_analyzer = BatchAnalyzerEngine(analyzer_engine=analyzer)
+        self.pattern_recognizers = [
+            r
+            for r in analyzer.get_recognizers(language)
+            if not isinstance(r, SpacyRecognizer)
+        ]
+
+    def anonymize_json(self, data, policies=None):
+        """
+        Returns a copy of a JSON-compatible object with PII masked in its values.
+        """
+        policies = self._normalize_policies(policies)
+        # Box the document so a top-level scalar is handled like any other value
+        box = [copy.deepcopy(data)]
+        slots = []
+        self._collect(box, None, policies, slots)
+        self._process(slots)
+        return box[0]
+
+    def anonymize_csv(self, text, policies=None, delimiter=","):
+        """
+        Anonymizes a CSV table; the first row is a header with field names.
+        """
+        policies = self._normalize_policies(policies)
+        rows = list(csv.reader(io.StringIO(text), delimiter=delimiter))
+        slots = []
+        if rows:
+            header = rows[0]
+            for row in rows[1:]:
+                for i, value in enumerate(row):
+                    name = header[i] if i < len(header) else None
+                    policy = policies.get(name.lower()) if name else None
+                    self._add_slot(row, i, value, policy, slots)
+        self._process(slots)
+
+        out = io.StringIO()
+        csv.writer(out, delimiter=delimiter, lineterminator="\n").writerows(rows)
+        return out.getvalue()
+
+    def _normalize_policies(self, policies):
+        result = dict(DEFAULT_FIELD_POLICIES)
+        for name, policy in (policies or {}).items():
+            if policy not in (SKIP, REGEX, FULL) and policy not in self.operators:
+                raise ValueError(f"Unknown policy '{policy}' for field '{name}'")
+            result[name.lower()] = policy
+        return result
+
+    def _collect(self, node, policy, policies, slots):
+        """
+        Walks a container; `policy` is inherited from the enclosing field, if any.
+        """
+        if isinstance(node, dict):
+            for key, value in node.items():
+                child_policy = policy or policies.get(str(key).lower())
+                if isinstance(value, (dict, list)):
+                    self._collect(value, child_policy, policies, slots)
+                else:
+                    self._add_slot(node, key, value, child_policy, slots)
+        elif isinstance(node, list):
+            for i, value in enumerate(node):
+                if isinstance(value, (dict, list)):
+                    self._collect(value, policy, policies, slots)
+                else:
+                    self._add_slot(node, i, value, policy, slots)
+
+    def _add_slot(self, container, key, value, policy, slots):
+        if value is None or isinstance(value, bool) or value == "":
+            return
+        if policy is None:
+            if isinstance(value, (int, float)) or (
+                NUMBER_RE.match(value)
+                or ISO_DATETIME_RE.match(value)
+                or UUID_RE.match(value)
+            ):
+                policy = SKIP
+            elif NO_LETTERS_RE.match(value):
+                policy = REGEX
+            else:
+                policy = FULL
+        if policy != SKIP:
+            slots.append((container, key, value, policy))
+
+    def _process(self, slots):
+        full = [slot for slot in slots if slot[3] == FULL]
+        full_results = []
+        if full:
+            full_results = self.batch_analyzer.analyze_iterator(
+                [slot[2] for slot in full],
+                language=self.language,
+                batch_size=self.batch_size,
+            )
+        results_by_slot = {id(slot): res for slot, res in zip(full, full_results)}
+
+        for slot in slots:
+            container, key, value, policy = slot
+            text = str(value)
+            if policy == FULL:
+                results = results_by_slot[id(slot)]
+            elif policy == REGEX:
+                results = self._analyze_patterns(text)
+            else:
+                results = [RecognizerResult(policy, 0, len(text), 1.0)]
+            if results:
+                container[key] = self.anonymizer.anonymize(
+                    text=text, analyzer_results=results, operators=self.operators
+                ).text
+
+        logger.info(
+            f"Structured anonymization: {len(slots)} values, {len(full)} via NER"
+        )
+
+    def _analyze_patterns(self, text):
+        results = []
+        for recognizer in self.pattern_recognizers:
+            results.extend(recognizer.analyze(text, recognizer.supported_entities))
+        threshold = self.analyzer.default_score_threshold
+        return [
+            r
+            for r in EntityRecognizer.remove_duplicates(results)
+            if r.score >= threshold
+        ]
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import tempfile
+from fastapi.testclient import TestClient
+import api_server
+from job_queue import JobStore
+
+KEYS = {
+    "alice-key": {"user": "alice", "limit": 5},
+    "bob-key": {"user": "bob", "limit": 5},
+}
+ALICE = {"X-API-Key": "alice-key"}
+BOB = {"X-API-Key": "bob-key"}
+
+
+def make_client(max_pending=None):
+    # No `with` block: the startup hook and the background worker do not run,
+    # so jobs stay queued until run_next_chunk is called explicitly
+    api_server.api_keys_db = {key: dict(data) for key, data in KEYS.items()}
+    api_server.request_counts.clear()
+    path = os.path.join(tempfile.mkdtemp(), "jobs.db")
+    api_server.job_store = JobStore(path, max_pending=max_pending)
+    return TestClient(api_server.app)
+
+
+def submit(client, texts, headers=ALICE):
+    return client.post("/jobs", json={"texts": texts}, headers=headers)
+
+
+def test_other_tenant_gets_404():
+    client = make_client()
+    job_id = submit(client, ["Иван"]).json()["id"]
+
+    assert client.get(f"/jobs/{job_id}", headers=ALICE).status_code == 200
+    assert client.get(f"/jobs/{job_id}", headers=BOB).status_code == 404
+    assert client.get(f"/jobs/{job_id}/result", headers=BOB).status_code == 404
+    assert client.delete(f"/jobs/{job_id}", headers=BOB).status_code == 404
+
+
+def test_result_before_done_is_409():
+    client = make_client()
+    job_id = submit(client, ["Иван"]).json()["id"]
+
+    response = client.get(f"/jobs/{job_id}/result", headers=ALICE)
+    assert response.status_code == 409
+
+    asyncio.run(api_server.run_next_chunk())
+    response = client.get(f"/jobs/{job_id}/result", headers=ALICE)
+    assert response.status_code == 200
+    assert len(response.json()["results"]) == 1
+
+
+def test_spool_unavailable_is_503():
+    client = make_client()
+    api_server.job_store = None
+
+    assert submit(client, ["Иван"]).status_code == 503
+    assert client.get("/jobs/whatever", headers=ALICE).status_code == 503
+
+
+def test_failing_handler_marks_job_failed():
+    client = make_client()
+    job_id = submit(client, ["Иван"]).json()["id"]
+
+    def broken(text):
+        raise RuntimeError("boom")
+
+    handler = api_server.JOB_HANDLERS["anonymize"]
+    api_server.JOB_HANDLERS["anonymize"] = broken
+    try:
+        assert asyncio.run(api_server.run_next_chunk())
+    finally:
+        api_server.JOB_HANDLERS["anonymize"] = handler
+
+    job = client.get(f"/jobs/{job_id}", headers=ALICE).json()
+    assert job["status"] == "failed"
+    assert job["error"] == "boom"
+    assert not asyncio.run(api_server.run_next_chunk())
+
+
+def test_texts_count_against_limit():
+    client = make_client()
+    job_id = submit(client, ["a", "b", "c"]).json()["id"]
+    for _ in range(10):
+        assert client.get(f"/jobs/{job_id}", headers=ALICE).status_code == 200
+
+    assert submit(client, ["d", "e", "f"]).status_code == 429
+    assert submit(client, ["d", "e"]).status_code == 202
+    assert submit(client, ["f"]).status_code == 429
+
+
+def test_pending_limit_is_429():
+    client = make_client(max_pending=2)
+    assert submit(client, ["a", "b"]).status_code == 202
+    assert submit(client, ["c"]).status_code == 429
+
+    # Rejected texts are not charged against the key's limit
+    asyncio.run(api_server.run_next_chunk())
+    assert submit(client, ["c", "d"]).status_code == 202
+    assert submit(client, ["e"]).status_code == 429
+
+
+if __name__ == "__main__":
+    test_other_tenant_gets_404()
+    test_result_before_done_is_409()
+    test_spool_unavailable_is_503()
+    test_failing_handler_marks_job_failed()
+    test_texts_count_against_limit()
+    test_pending_limit_is_429()
+    print("All job API tests passed.")
@@ -0,0 +1,147 @@
+import os
+import tempfile
+from job_queue import JobStore, PendingLimitError
+
+
+def make_store(chunk_size=2):
+    path = os.path.join(tempfile.mkdtemp(), "jobs.db")
+    return path, JobStore(path, chunk_size=chunk_size)
+
+
+def drain(store, weights, steps):
+    order = []
+    for _ in range(steps):
+        chunk = store.next_chunk(weights)
+        if chunk is None:
+            break
+        job_id, kind, items = chunk
+        order.append(store.get(job_id)["owner"])
+        store.complete_chunk(job_id, [(seq, text.upper()) for seq, text in items])
+    return order
+
+
+def test_results_keep_order():
+    _, store = make_store()
+    job_id = store.submit("alice", "anonymize", ["a", "b", "c"])
+    drain(store, {"alice": 1}, 10)
+
+    job = store.get(job_id)
+    assert job["status"] == "done"
+    assert job["done"] == 3
+    assert store.results(job_id) == ["A", "B", "C"]
+    assert store.results(job_id, offset=1, limit=1) == ["B"]
+
+
+def test_bulk_tenant_does_not_starve_others():
+    _, store = make_store(chunk_size=1)
+    store.submit("bulk", "anonymize", ["x" * 10] * 100)
+    small = store.submit("interactive", "anonymize", ["y" * 10] * 2)
+
+    order = drain(store, {"bulk": 50, "interactive": 50}, 6)
+    assert order.count("interactive") == 2
+    assert store.get(small)["status"] == "done"
+
+
+def test_limit_weights_share():
+    _, store = make_store(chunk_size=1)
+    store.submit("admin", "anonymize", ["x"] * 100)
+    store.submit("guest", "anonymize", ["x"] * 100)
+
+    order = drain(store, {"admin": 1000, "guest": 50}, 42)
+    assert order.count("admin") >= 5 * order.count("guest")
+
+
+def test_priority_within_tenant():
+    _, store = make_store()
+    store.submit("alice", "anonymize", ["low"], priority=0)
+    urgent = store.submit("alice", "audit", ["high"], priority=5)
+
+    job_id, kind, items = store.next_chunk({"alice": 1})
+    assert job_id == urgent
+    assert kind == "audit"
+    assert items == [(0, "high")]
+
+
+def test_spool_survives_restart():
+    path, store = make_store()
+    job_id = store.submit("alice", "anonymize", ["a", "b", "c"])
+    drain(store, {"alice": 1}, 1)
+    store.close()
+
+    store = JobStore(path, chunk_size=2)
+    assert store.get(job_id)["done"] == 2
+    drain(store, {"alice": 1}, 10)
+    assert store.get(job_id)["status"] == "done"
+    assert store.results(job_id) == ["A", "B", "C"]
+
+
+def test_failed_job_is_not_scheduled():
+    _, store = make_store()
+    job_id = store.submit("alice", "anonymize", ["a", "b", "c"])
+    store.fail(job_id, "boom")
+
+    assert store.next_chunk({"alice": 1}) is None
+    assert store.get(job_id)["error"] == "boom"
+
+
+def test_payload_erased_after_processing():
+    _, store = make_store()
+    job_id = store.submit("alice", "anonymize", ["secret", "text", "more"])
+    drain(store, {"alice": 1}, 1)
+
+    payloads = [
+        row[0]
+        for row in store._conn.execute(
+            "SELECT payload FROM job_items WHERE job_id = ? ORDER BY seq", (job_id,)
+        )
+    ]
+    assert payloads == ["", "", "more"]
+
+
+def test_delete_and_purge():
+    _, store = make_store()
+    deleted = store.submit("alice", "anonymize", ["a"])
+    finished = store.submit("alice", "anonymize", ["b"])
+    drain(store, {"alice": 1}, 2)
+    pending = store.submit("bob", "anonymize", ["c"])
+
+    assert store.delete(deleted)
+    assert not store.delete(deleted)
+    assert store.get(deleted) is None
+    assert store.results(deleted) == []
+
+    assert store.purge(3600) == 0
+    store._conn.execute("UPDATE jobs SET updated_at = '2000-01-01T00:00:00Z'")
+    assert store.purge(3600) == 1
+    assert store.get(finished) is None
+    assert store.get(pending)["status"] == "queued"
+
+
+def test_pending_limit():
+    _, store = make_store()
+    store.max_pending = 3
+    store.submit("alice", "anonymize", ["a", "b"])
+    try:
+        store.submit("alice", "anonymize", ["c", "d"])
+    except PendingLimitError:
+        pass
+    else:
+        raise AssertionError("PendingLimitError expected")
+
+    # Other tenants and processed items do not count
+    store.submit("bob", "anonymize", ["x", "y", "z"])
+    drain(store, {"alice": 1000, "bob": 1}, 1)
+    store.submit("alice", "anonymize", ["c", "d"])
+
+
+if __name__ == "__main__":
+    test_results_keep_order()
+    test_bulk_tenant_does_not_starve_others()
+    test_limit_weights_share()
+    test_priority_within_tenant()
+    test_spool_survives_restart()
+    test_failed_job_is_not_scheduled()
+    test_payload_erased_after_processing()
+    test_delete_and_purge()
+    test_pending_limit()
+    print("All job queue tests passed.")
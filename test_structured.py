@@ -0,0 +1,130 @@
+from api_server import structured_anonymizer as structured
+
+
+def test_json_keeps_structure():
+    record = {
+        "id": 42,
+        "uuid": "123e4567-e89b-12d3-a456-426614174000",
+        "inn": "7707083893",
+        "active": True,
+        "contacts": {
+            "phone": ["+7 900 123 45 67"],
+            "note": "Меня зовут Иван Петров, мой паспорт 4500 123456.",
+        },
+    }
+    result = structured.anonymize_json(record)
+    print(f"Result: {result}")
+
+    assert result["id"] == 42
+    assert result["uuid"] == record["uuid"]
+    assert result["inn"] == "<INN>"
+    assert result["active"] is True
+    assert result["contacts"]["phone"] == ["<PHONE>"]
+    assert "<PASSPORT_RF>" in result["contacts"]["note"]
+    assert record["inn"] == "7707083893"
+
+
+def test_json_policies():
+    record = [{"name": "Иван Петров", "comment": "Иван Петров", "code": "7707083893"}]
+    result = structured.anonymize_json(
+        record, {"name": "PERSON", "comment": "skip", "code": "regex"}
+    )
+    print(f"Result: {result}")
+
+    assert result == [{"name": "<PERSON>", "comment": "Иван Петров", "code": "<INN>"}]
+
+
+def test_numbers_keep_type():
+    record = {
+        "amount": 1500,
+        "qty": 100,
+        "price": 1999.5,
+        "order_id": 123456,
+        "year": 2024,
+        "inn": 7707083893,
+    }
+    result = structured.anonymize_json(record)
+    print(f"Result: {result}")
+
+    assert result == {
+        "amount": 1500,
+        "qty": 100,
+        "price": 1999.5,
+        "order_id": 123456,
+        "year": 2024,
+        "inn": "<INN>",
+    }
+
+
+def test_numeric_strings_unchanged():
+    record = {
+        "amount": "1500.00",
+        "year": "2024",
+        "qty": "100",
+        "created": "2024-01-15T10:00:00Z",
+        "zip": "101000",
+        "contact": "+7 900 123 45 67",
+    }
+    result = structured.anonymize_json(record)
+    print(f"Result: {result}")
+
+    assert result == {**record, "contact": "<PHONE>"}
+
+
+def test_top_level_scalar():
+    assert structured.anonymize_json("ИНН 7707083893") == "ИНН <INN>"
+    assert structured.anonymize_json(2024) == 2024
+
+
+def test_container_policies():
+    record = {
+        "meta": {"x": "4500 123456", "tags": ["Иван Петров"]},
+        "client": {"name": "Иван", "surname": "Петров"},
+    }
+    result = structured.anonymize_json(record, {"meta": "skip", "client": "PERSON"})
+    print(f"Result: {result}")
+
+    assert result == {
+        "meta": {"x": "4500 123456", "tags": ["Иван Петров"]},
+        "client": {"name": "<PERSON>", "surname": "<PERSON>"},
+    }
+
+
+def test_csv_keeps_header():
+    table = "name,inn,comment\nИван Петров,7707083893,тел +7 900 123 45 67\n"
+    result = structured.anonymize_csv(table, {"name": "PERSON"})
+    print(f"Result: {result}")
+
+    assert result.splitlines() == ["name,inn,comment", "<PERSON>,<INN>,тел <PHONE>"]
+
+
+def test_csv_numeric_columns():
+    table = "amount,qty,year,created,inn\n1500,100,2024,2024-01-15,7707083893\n"
+    result = structured.anonymize_csv(table)
+    print(f"Result: {result}")
+
+    assert result.splitlines() == [
+        "amount,qty,year,created,inn",
+        "1500,100,2024,2024-01-15,<INN>",
+    ]
+
+
+def test_unknown_policy():
+    try:
+        structured.anonymize_json({"a": "b"}, {"a": "ful"})
+    except ValueError:
+        return
+    raise AssertionError("ValueError expected for unknown policy")
+
+
+if __name__ == "__main__":
+    test_json_keeps_structure()
+    test_json_policies()
+    test_numbers_keep_type()
+    test_numeric_strings_unchanged()
+    test_top_level_scalar()
+    test_container_policies()
+    test_csv_keeps_header()
+    test_csv_numeric_columns()
+    test_unknown_policy()
+    print("All structured tests passed.")
@@ -0,0 +1,134 @@
+import gzip
+import json
+import msgpack
+import zstandard
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+import wire
+from wire import WireRoute, decompress, render
+
+PAYLOAD = {"anonymized_text": "Меня зовут <PERSON>", "score": 0.85}
+BODY = json.dumps(PAYLOAD, ensure_ascii=False).encode()
+
+
+class EchoRequest(BaseModel):
+    anonymized_text: str
+    score: float
+
+
+app = FastAPI()
+app.router.route_class = WireRoute
+
+
+@app.post("/echo")
+async def echo(request: EchoRequest, http_request: Request):
+    return render(http_request, request.model_dump())
+
+
+def make_request(accept):
+    headers = [(b"accept", accept.encode())] if accept else []
+    return Request({"type": "http", "headers": headers})
+
+
+def expect_status(fn, status_code):
+    try:
+        fn()
+    except HTTPException as e:
+        assert e.status_code == status_code
+        return
+    raise AssertionError(f"HTTP {status_code} expected")
+
+
+def test_render_negotiates_format():
+    response = render(make_request(""), PAYLOAD)
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == PAYLOAD
+
+    response = render(make_request("application/msgpack"), PAYLOAD, status_code=202)
+    assert response.media_type == "application/msgpack"
+    assert response.status_code == 202
+    assert msgpack.unpackb(response.body) == PAYLOAD
+    assert response.headers["vary"] == "Accept"
+
+
+def test_render_respects_q_values():
+    cases = [
+        ("application/msgpack;q=0, application/json", "application/json"),
+        ("application/json;q=0.5, application/x-msgpack", "application/x-msgpack"),
+        ("application/msgpack;q=0.5, application/json", "application/json"),
+        ("application/*, application/json;q=0.1", "application/msgpack"),
+        ("*/*", "application/json"),
+        ("text/html", "application/json"),
+    ]
+    for accept, media_type in cases:
+        response = render(make_request(accept), PAYLOAD)
+        assert response.media_type == media_type, accept
+        assert response.headers["vary"] == "Accept"
+
+
+def test_route_decompresses_gzip_body():
+    client = TestClient(app)
+    response = client.post(
+        "/echo",
+        content=gzip.compress(BODY),
+        headers={
+            "Content-Type": "application/json",
+            "Content-Encoding": "gzip",
+            "Accept": "application/msgpack",
+        },
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == PAYLOAD
+
+    response = client.post(
+        "/echo",
+        content=b"not gzip",
+        headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+    )
+    assert response.status_code == 400
+
+
+def test_render_big_integers():
+    payload = {"data": {"n": 12345678901234567890123}}
+    for accept in ("", "application/msgpack"):
+        response = render(make_request(accept), payload)
+        assert response.media_type == "application/json"
+        assert json.loads(response.body) == payload
+
+
+def test_decompress_bodies():
+    assert decompress(BODY, "") == BODY
+    assert decompress(gzip.compress(BODY), "gzip") == BODY
+    assert decompress(zstandard.ZstdCompressor().compress(BODY), "zstd") == BODY
+
+
+def test_decompress_zstd_frames():
+    compressor = zstandard.ZstdCompressor()
+    body = compressor.compress(BODY[:10]) + compressor.compress(BODY[10:])
+    assert decompress(body, "zstd") == BODY
+
+
+def test_decompress_errors():
+    expect_status(lambda: decompress(BODY, "br"), 415)
+    expect_status(lambda: decompress(b"not gzip", "gzip"), 400)
+    expect_status(lambda: decompress(b"not zstd", "zstd"), 400)
+
+    limit = wire.MAX_BODY_BYTES
+    wire.MAX_BODY_BYTES = 1024
+    try:
+        expect_status(lambda: decompress(gzip.compress(b"0" * 4096), "gzip"), 413)
+    finally:
+        wire.MAX_BODY_BYTES = limit
+
+
+if __name__ == "__main__":
+    test_render_negotiates_format()
+    test_render_respects_q_values()
+    test_render_big_integers()
+    test_route_decompresses_gzip_body()
+    test_decompress_bodies()
+    test_decompress_zstd_frames()
+    test_decompress_errors()
+    print("All wire format tests passed.")
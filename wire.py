@@ -0,0 +1,184 @@
+import gzip
+import io
+import json
+import logging
+import os
+import zlib
+from fastapi import HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+
+# Optional fast codecs; without them the server falls back to stdlib JSON
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Configure logger
+logger = logging.getLogger("wire")
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+# Upper bound for a decompressed request body, protects against zip bombs
+MAX_BODY_BYTES = int(os.getenv("MAX_BODY_BYTES", str(50 * 1024 * 1024)))
+
+
+def dumps_json(content) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(content)
+        except TypeError:
+            # orjson rejects integers beyond 64 bits; stdlib json does not
+            pass
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def parse_accept(accept: str) -> list:
+    """
+    Parses an Accept header into (media_range, q) pairs.
+    """
+    ranges = []
+    for part in accept.split(","):
+        media_range, *params = [item.strip() for item in part.split(";")]
+        if not media_range:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        ranges.append((media_range.lower(), q))
+    return ranges
+
+
+def quality(ranges: list, media_type: str) -> float:
+    """
+    Returns the q-value of the most specific range matching `media_type`.
+    """
+    main_type = media_type.split("/")[0]
+    best = (-1, 0.0)
+    for media_range, q in ranges:
+        if media_range == media_type:
+            specificity = 2
+        elif media_range == f"{main_type}/*":
+            specificity = 1
+        elif media_range == "*/*":
+            specificity = 0
+        else:
+            continue
+        best = max(best, (specificity, q), key=lambda match: match[0])
+    return best[1]
+
+
+def render(request: Request, content, status_code: int = 200) -> Response:
+    """
+    Serializes a plain dict/list response according to the Accept header.
+
+    MessagePack is returned when application/msgpack (or application/x-msgpack)
+    has a higher q-value than application/json, JSON (encoded with orjson when
+    installed) otherwise. Content MessagePack cannot represent (integers beyond
+    64 bits) is sent as JSON instead. Responses carry `Vary: Accept` so caches
+    keep the formats apart. Returning a Response directly also skips FastAPI's
+    response_model validation and encoding pass.
+    """
+    headers = {"Vary": "Accept"}
+    ranges = parse_accept(request.headers.get("accept", ""))
+    if msgpack is not None and ranges:
+        json_q = quality(ranges, JSON_MEDIA_TYPE)
+        msgpack_q, media_type = max(
+            (
+                (quality(ranges, media_type), media_type)
+                for media_type in MSGPACK_MEDIA_TYPES
+            ),
+            key=lambda match: match[0],
+        )
+        if msgpack_q > 0 and msgpack_q > json_q:
+            try:
+                body = msgpack.packb(content, use_bin_type=True)
+            except (OverflowError, TypeError):
+                pass
+            else:
+                return Response(
+                    body,
+                    status_code=status_code,
+                    media_type=media_type,
+                    headers=headers,
+                )
+    return Response(
+        dumps_json(content),
+        status_code=status_code,
+        media_type=JSON_MEDIA_TYPE,
+        headers=headers,
+    )
+
+
+def decompress(body: bytes, encoding: str) -> bytes:
+    """
+    Decodes a request body by its Content-Encoding (gzip, zstd or identity).
+    """
+    if encoding in ("", "identity"):
+        return body
+    if encoding in ("gzip", "x-gzip"):
+        reader = gzip.GzipFile(fileobj=io.BytesIO(body))
+        errors = (OSError, EOFError, zlib.error)
+    elif encoding == "zstd" and zstandard is not None:
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            io.BytesIO(body), read_across_frames=True
+        )
+        errors = (zstandard.ZstdError,)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported Content-Encoding: {encoding}",
+        )
+
+    try:
+        data = reader.read(MAX_BODY_BYTES + 1)
+    except errors as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid {encoding} body: {e}",
+        )
+    if len(data) > MAX_BODY_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail="Decompressed body is too large",
+        )
+    return data
+
+
+class DecompressedRequest(Request):
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            encoding = self.headers.get("content-encoding", "").strip().lower()
+            self._body = decompress(body, encoding)
+        return self._body
+
+
+class WireRoute(APIRoute):
+    """
+    Route class that transparently decompresses gzip/zstd request bodies.
+    """
+
+    def get_route_handler(self):
+        original_route_handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            request = DecompressedRequest(request.scope, request.receive)
+            return await original_route_handler(request)
+
+        return route_handler